@@ -0,0 +1,57 @@
+from math import pi as _PI, sqrt as _SQRT
+from functools import lru_cache
+import streamlit as st
+
+# Thomsen's exponent for the ellipsoid surface approximation, and other constants bound once at import
+_P = 1.6075
+_INV_P = 1 / _P
+_TWO_PI = 2 * _PI
+_TWO_THIRDS_PI = (2 / 3) * _PI
+_LENGTH_POW = 1.5**_P  # Length is fixed at 1.5 times the width
+
+# Ellipsoid volume/surface area calculations shared by the Watershaper app
+@lru_cache(maxsize=256)
+def ellipsoid_sv(a, b, c):
+    """Approximate curved surface area (without base) and volume of a half-ellipsoid."""
+    ab = a * b
+    surface_area = _TWO_PI * ((ab**_P + (a * c)**_P + (b * c)**_P) / 3)**_INV_P
+    volume = _TWO_THIRDS_PI * ab * c
+    return surface_area, volume
+
+@st.cache_data(show_spinner=False)
+def calculate_ellipsoids(min_surface_area, min_volume, depths):
+    """Calculate width and length for the given constraints at each depth in one vectorized pass."""
+    import numpy as np  # Imported lazily so the ditch-only path never pays numpy's start-up cost
+
+    c = np.asarray(depths, dtype=float)  # Depth corresponds to the semi-minor axis
+
+    # With the length fixed at b = 1.5 * a the volume reduces to pi * a**2 * c, so the minimum volume gives a directly
+    a = np.sqrt(min_volume / (_PI * c))
+
+    # The depth is fixed per shape, so (ab)^p + (ac)^p + (bc)^p = 1.5^p * a^(2p) + c^p * (1 + 1.5^p) * a^p
+    # and only a^p and the outer root are left to compute per step
+    depth_pow = c**_P * (1 + _LENGTH_POW)
+
+    # Surface area grows monotonically with a, so only widen the shapes whose volume-based width falls short
+    a_pow = a**_P
+    short = _TWO_PI * ((_LENGTH_POW * a_pow * a_pow + depth_pow * a_pow) / 3)**_INV_P < min_surface_area
+    if short.any():
+        # Newton steps from an upper bound (ignoring the depth terms overestimates the width); the area is convex
+        # in a, so the iterates decrease monotonically onto the minimum surface area
+        a = np.where(short, _SQRT(min_surface_area * 3**_INV_P / (3 * _PI)), a)
+        # Widths are shown to the centimetre, so stop at a 0.1 mm step (with a cap on the iterations)
+        for _ in range(25):
+            a_pow = a**_P
+            u = _LENGTH_POW * a_pow * a_pow  # (ab)^p grows with a^(2p)
+            vw = depth_pow * a_pow  # (ac)^p + (bc)^p grow with a^p
+            t = (u + vw) / 3
+            surface_area = _TWO_PI * t**_INV_P
+            slope = surface_area * (2 * u + vw) / (3 * a * t)
+            step = np.where(short, (surface_area - min_surface_area) / slope, 0.0)
+            a = a - step
+            if (step <= 1e-4).all():
+                break
+
+    # Nudge up slightly so floating-point rounding never leaves the shape just under a minimum requirement
+    a = np.maximum(a * (1 + 1e-12), 0.1)  # Smallest allowable width
+    return [(float(width), float(1.5 * width), float(depth)) for width, depth in zip(a, c)]
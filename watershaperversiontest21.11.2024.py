@@ -1,97 +1,18 @@
-import scipy.optimize as opt
-import math
+from bisect import bisect_right
+from math import sqrt as _SQRT
 import streamlit as st
 
-# Existing functions for the ellipsoid and volume/surface area calculations
-def ellipsoid_surface_area_one_side(a, b, c):
-    """Approximate curved surface area of one side of a half-ellipsoid (without base)."""
-    p = 1.6075
-    surface_area = 2 * math.pi * (((a * b)**p + (a * c)**p + (b * c)**p) / 3)**(1 / p)
-    return surface_area
-
-def ellipsoid_volume(a, b, c):
-    """Calculate volume of a half-ellipsoid."""
-    return (2 / 3) * math.pi * a * b * c
-
-def objective(params, min_surface_area, c, min_volume):
-    """Objective function for optimization, focusing on minimizing the difference in volume and surface area."""
-    a, b = params  # Width and length
-    surface_area = ellipsoid_surface_area_one_side(a, b, c)
-    volume = ellipsoid_volume(a, b, c)
-    
-    # Penalize based on how far the calculated volume and surface area are from the minimum requirements
-    surface_area_diff = abs(surface_area - min_surface_area)  
-    volume_diff = abs(volume - min_volume)  # Minimize volume difference
-    return surface_area_diff + volume_diff  # Objective: minimize both differences
-
-def calculate_ellipsoid(min_surface_area, min_volume, depth):
-    """Calculate width and length for the given constraints."""
-    c = depth  # Depth corresponds to the semi-minor axis
-    initial_guess = [min_surface_area / 100, min_surface_area / 80]  # Dynamic initial guess based on surface area
-
-    # Constraints: volume and surface area
-    constraints = [
-        {"type": "ineq", "fun": lambda params: ellipsoid_volume(params[0], params[1], c) - min_volume},  # Volume >= min_volume
-        {"type": "ineq", "fun": lambda params: params[1] - 1.5 * params[0]}  # b >= 1.5 * a
-    ]
-
-    # Bounds for width and length
-    bounds = [(0.1, 100), (0.1, 100)]  # Allowable range for width (a) and length (b)
-
-    # Perform optimization
-    result = opt.minimize(
-        objective,
-        initial_guess,
-        args=(min_surface_area, c, min_volume),
-        bounds=bounds,
-        constraints=constraints
-    )
-
-    if result.success:
-        a, b = result.x
-        return a, b, c
-    else:
-        return None, None, None
+from ellipsoid_math import calculate_ellipsoids, ellipsoid_sv
 
-# Updated infiltration ditch function with corrections for trapezoidal cross-section
-def calculate_infiltration_ditch(width, depth, min_volume, min_surface_area, roof_area):
-    """
-    Calculate volume and surface area for an infiltration ditch with trapezoidal cross-section,
-    considering minimum volume and surface area requirements.
-    """
-    # Start by calculating the length such that the minimum volume is met
-    length = min_volume / ((width * 0.5 + width) / 2 * depth)  # Adjust length to match minimum volume
-    
-    # Now that we have the length based on volume, we can calculate the surface area
-    base_width = width * 0.5  # Base width is half the top width
-    slant_height = math.sqrt((width - base_width)**2 / 4 + depth**2)  # Slant height from top to base
-
-     # Function to calculate surface area based on length
-    def calculate_surface_area(length):
-        base_area = base_width * length  # Bottom area
-        top_area = width * length  # Top area
-        slanted_wall_area = slant_height * length  # One slanted wall
-        return 2 * slanted_wall_area  # two slanted walls
-
-    # Check if the surface area is below the minimum and adjust length accordingly
-    current_surface_area = calculate_surface_area(length)
-    
-    # If the surface area is smaller than the minimum required, increase the length
-    if current_surface_area < min_surface_area:
-        # Scale the length to match the minimum surface area by proportion
-        scale_factor = min_surface_area / current_surface_area
-        length *= scale_factor
-
-    # Calculate the final volume and surface area based on adjusted length
-    volume = ((base_width + width) / 2) * depth * length
-    surface_area = calculate_surface_area(length)
-    
-    # Return the volume, surface area, and adjusted length
-    return volume, surface_area, length
+# Rainwell sizes per roof area tier (m²); larger roofs get 100l per square meter
+RAINWELL_TIER_LIMITS = (80, 120, 200)
+RAINWELL_TIER_LABELS = ("5000l", "7500l", "10000l")
 
-# Streamlit UI setup
-st.set_page_config(page_title="Watershaper", layout="wide", initial_sidebar_state="expanded")
-st.markdown("""
+# Infiltration basin and wadi are sized together; each button only shows its own result
+ELLIPSOID_DEPTHS = (0.3, 0.5)
+
+# Page styling and logo markup
+CSS_BLOCK = """
     <style>
         .title { text-align: center; color: #1E2A47; }
         .subtitle { text-align: center; color: #1F75FE; margin-bottom: 30px; }
@@ -106,25 +27,56 @@ st.markdown("""
             .center-buttons { text-align: center; }
         }
     </style>
-""", unsafe_allow_html=True)
+"""
 
-# Display the logo at the top (smaller size)
-st.markdown("""
+LOGO_HTML = """
     <div style="text-align: center;">
         <img src="https://dndexaqt.be/wp-content/uploads/2022/12/mainlogo.png" width="100">
     </div>
-""", unsafe_allow_html=True)
+"""
+
+# Updated infiltration ditch function with corrections for trapezoidal cross-section
+@st.cache_data(show_spinner=False)
+def calculate_infiltration_ditch(width, depth, min_volume, min_surface_area, roof_area):
+    """
+    Calculate volume and surface area for an infiltration ditch with trapezoidal cross-section,
+    considering minimum volume and surface area requirements.
+    """
+    base_width = width * 0.5  # Base width is half the top width
+    slant_height = _SQRT((width - base_width)**2 / 4 + depth**2)  # Slant height from top to base
+    cross_section = 0.75 * width * depth  # Trapezoid area: (base_width + width) / 2 * depth
+
+    # Length such that the minimum volume is met; the infiltration surface is the two slanted walls
+    length = min_volume / cross_section
+    surface_area = 2 * slant_height * length
+
+    # If the surface area is smaller than the minimum required, lengthen the ditch by proportion
+    if surface_area < min_surface_area:
+        length *= min_surface_area / surface_area
+        surface_area = min_surface_area
+
+    # Return the volume, surface area, and adjusted length
+    return cross_section * length, surface_area, length
+
+# Streamlit UI setup
+st.set_page_config(page_title="Watershaper", layout="wide", initial_sidebar_state="expanded")
+st.markdown(CSS_BLOCK, unsafe_allow_html=True)
+
+# Display the logo at the top (smaller size)
+st.markdown(LOGO_HTML, unsafe_allow_html=True)
 
 # Title and description
 st.markdown("<h1 class='title'>Watershaper</h1>", unsafe_allow_html=True)
 st.markdown("<p class='subtitle'>Bereken de minimum vereisten en afmetingen voor bovengrondse infiltratie en regenputten volgens de GSV van 2023.</p>", unsafe_allow_html=True)
 
-# Sidebar for inputs
+# Sidebar for inputs, grouped in a form so edits only rerun the app once they are submitted
 with st.sidebar:
     st.header("Parameters")
-    roof_square_meters = st.number_input('Horizontaal Dakoppervlak (m²):', min_value=0.0, value=50.0, step=0.1)
-    has_rainwell = st.checkbox('Regenput met hergebruik aanwezig (-30 m²)', value=False)
-    depth = st.slider('Diepte infiltratiegracht (m):', min_value=0.3, max_value=1.0, value=0.5, step=0.1)
+    with st.form('params'):
+        roof_square_meters = st.number_input('Horizontaal Dakoppervlak (m²):', min_value=0.0, value=50.0, step=0.1)
+        has_rainwell = st.checkbox('Regenput met hergebruik aanwezig (-30 m²)', value=False)
+        depth = st.slider('Diepte infiltratiegracht (m):', min_value=0.3, max_value=1.0, value=0.5, step=0.1)
+        st.form_submit_button('Bijwerken')
 
 # Calculate minimum volume and surface area for ellipsoid
 min_volume = (roof_square_meters * 33) / 1000  # Convert to cubic meters
@@ -140,15 +92,12 @@ st.markdown(f"### Min Volume: {min_volume:.2f} m³")
 st.markdown(f"### Min infiltratie oppervlakte: {min_surface_area:.2f} m²")
 
 # Display the Rainwell minimum size message
-if roof_square_meters < 80:
-    st.subheader ("**Regenput dimensionering:** 5000l")
-elif 80 <= roof_square_meters < 120:
-    st.subheader("**Regenput dimensionering:** 7500l")
-elif 120 <= roof_square_meters < 200:
-    st.subheader("**Regenput dimensionering:** 10000l")
+tier = bisect_right(RAINWELL_TIER_LIMITS, roof_square_meters)
+if tier < len(RAINWELL_TIER_LABELS):
+    rainwell_label = RAINWELL_TIER_LABELS[tier]
 else:
-    rainwell_size = roof_square_meters * 100  # 100l per square meter
-    st.subheader(f"**Regenput dimensionering:** {rainwell_size:.0f}l")
+    rainwell_label = f"{roof_square_meters * 100:.0f}l"  # 100l per square meter
+st.subheader(f"**Regenput dimensionering:** {rainwell_label}")
 
 # Initialize session state for storing results if they don't already exist
 if 'results' not in st.session_state:
@@ -159,52 +108,44 @@ col1, col2, col3 = st.columns(3)
 with col1:
     if st.button('Bereken Infiltratiekom'):
         with st.spinner('Calculating...'):
-            width, length, depth = calculate_ellipsoid(min_surface_area, min_volume, 0.3)
-            if width is not None and length is not None:
-                diameter_width = width * 2
-                diameter_length = length * 2
-                final_surface_area = ellipsoid_surface_area_one_side(width, length, depth)
-                final_volume = ellipsoid_volume(width, length, depth)
-
-                with st.container():
-                    st.subheader("Resultaat:")
-                    st.write(f"**Breedte:** {diameter_width:.2f} m")
-                    st.write(f"**Lengte:** {diameter_length:.2f} m")
-                    st.write(f"**Diepte:** {depth:.2f} m")
-                    st.write(f"**Verhouding:** {diameter_length / diameter_width:.2f}")
-                    st.write(f"**Infiltratie oppervlakte:** {final_surface_area:.2f} m²")
-                    st.write(f"**Volume:** {final_volume:.2f} m³")
-                    if final_volume < min_volume:
-                        st.warning("Opgelet: Volume zit onder gevraagde hoeveelheid.")
-                    else:
-                        st.success("Volume zit boven of is gelijk aan gevraagde hoeveelheid.")
-            else:
-                st.error('Error, controleer parameters')
+            width, length, depth = calculate_ellipsoids(min_surface_area, min_volume, ELLIPSOID_DEPTHS)[0]
+            diameter_width = width * 2
+            diameter_length = length * 2
+            final_surface_area, final_volume = ellipsoid_sv(width, length, depth)
+
+            with st.container():
+                st.subheader("Resultaat:")
+                st.write(f"**Breedte:** {diameter_width:.2f} m")
+                st.write(f"**Lengte:** {diameter_length:.2f} m")
+                st.write(f"**Diepte:** {depth:.2f} m")
+                st.write(f"**Verhouding:** {diameter_length / diameter_width:.2f}")
+                st.write(f"**Infiltratie oppervlakte:** {final_surface_area:.2f} m²")
+                st.write(f"**Volume:** {final_volume:.2f} m³")
+                if final_volume < min_volume:
+                    st.warning("Opgelet: Volume zit onder gevraagde hoeveelheid.")
+                else:
+                    st.success("Volume zit boven of is gelijk aan gevraagde hoeveelheid.")
 
 with col2:
     if st.button('Bereken Wadi'):
         with st.spinner('Calculating...'):
-            width, length, depth = calculate_ellipsoid(min_surface_area, min_volume, 0.5)
-            if width is not None and length is not None:
-                diameter_width = width * 2
-                diameter_length = length * 2
-                final_surface_area = ellipsoid_surface_area_one_side(width, length, depth)
-                final_volume = ellipsoid_volume(width, length, depth)
-
-                with st.container():
-                    st.subheader("Resultaat:")
-                    st.write(f"**Breedte:** {diameter_width:.2f} m")
-                    st.write(f"**Lengte:** {diameter_length:.2f} m")
-                    st.write(f"**Diepte:** {depth:.2f} m")
-                    st.write(f"**Verhouding:** {diameter_length / diameter_width:.2f}")
-                    st.write(f"**Infiltratie oppervlakte:** {final_surface_area:.2f} m²")
-                    st.write(f"**Volume:** {final_volume:.2f} m³")
-                    if final_volume < min_volume:
-                        st.warning("Opgelet: Volume zit onder gevraagde hoeveelheid.")
-                    else:
-                        st.success("Volume zit boven of is gelijk aan gevraagde hoeveelheid.")
-            else:
-                st.error('Error, controleer parameters')
+            width, length, depth = calculate_ellipsoids(min_surface_area, min_volume, ELLIPSOID_DEPTHS)[1]
+            diameter_width = width * 2
+            diameter_length = length * 2
+            final_surface_area, final_volume = ellipsoid_sv(width, length, depth)
+
+            with st.container():
+                st.subheader("Resultaat:")
+                st.write(f"**Breedte:** {diameter_width:.2f} m")
+                st.write(f"**Lengte:** {diameter_length:.2f} m")
+                st.write(f"**Diepte:** {depth:.2f} m")
+                st.write(f"**Verhouding:** {diameter_length / diameter_width:.2f}")
+                st.write(f"**Infiltratie oppervlakte:** {final_surface_area:.2f} m²")
+                st.write(f"**Volume:** {final_volume:.2f} m³")
+                if final_volume < min_volume:
+                    st.warning("Opgelet: Volume zit onder gevraagde hoeveelheid.")
+                else:
+                    st.success("Volume zit boven of is gelijk aan gevraagde hoeveelheid.")
 
 with col3:
     if st.button('Bereken Infiltratiegracht'):